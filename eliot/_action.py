@@ -7,16 +7,15 @@ top-level actions.
 
 from __future__ import unicode_literals, absolute_import
 
+import os
 import threading
-from uuid import uuid4
-from contextlib import contextmanager
+from uuid import UUID, uuid4
 from functools import partial
-from inspect import getcallargs
+from inspect import getcallargs, signature
 from contextvars import ContextVar
 
 from pyrsistent import field, PClass, optional, pmap_field, pvector
 from boltons.funcutils import wraps
-from six import text_type as unicode, PY3
 
 from ._message import (
     WrittenMessage,
@@ -49,6 +48,45 @@ def current_action():
     return _ACTION_CONTEXT.get(None)
 
 
+# Task UUIDs are generated from random bytes read in bulk, rather than doing a
+# separate os.urandom() call for every new task:
+_RANDOM_BUFFER_SIZE = 4096
+_random_buffer = threading.local()
+
+
+def _reset_random_buffer():
+    """
+    Discard all buffered random bytes, so a forked child process never hands
+    out the same UUIDs as its parent.
+    """
+    global _random_buffer
+    _random_buffer = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_random_buffer)
+
+    def _new_task_uuid():
+        """
+        @return: A new random (version 4) UUID, as a L{str}.
+        """
+        buf = _random_buffer
+        offset = getattr(buf, "offset", _RANDOM_BUFFER_SIZE)
+        if offset >= _RANDOM_BUFFER_SIZE:
+            buf.data = os.urandom(_RANDOM_BUFFER_SIZE)
+            offset = 0
+        buf.offset = offset + 16
+        return str(UUID(bytes=buf.data[offset : offset + 16], version=4))
+
+else:
+    # Python < 3.7 can't discard the buffer after a fork, so don't buffer:
+    def _new_task_uuid():
+        """
+        @return: A new random (version 4) UUID, as a L{str}.
+        """
+        return str(uuid4())
+
+
 class TaskLevel(object):
     """
     The location of a message within the tree of actions of a task.
@@ -114,9 +152,9 @@ class TaskLevel(object):
         """
         Convert to a Unicode string, for serialization purposes.
 
-        @return: L{unicode} representation of the L{TaskLevel}.
+        @return: L{str} representation of the L{TaskLevel}.
         """
-        return "/" + "/".join(map(unicode, self._level))
+        return "/" + "/".join(map(str, self._level))
 
     def next_sibling(self):
         """
@@ -161,6 +199,28 @@ class TaskLevel(object):
     to_string = toString
 
 
+class _ActionContext(object):
+    """
+    Context manager returned by L{Action.context}.
+
+    @ivar _action: The L{Action} to set as the current action.
+
+    @ivar _parent_token: The C{ContextVar} token to restore on C{__exit__}.
+    """
+
+    __slots__ = ("_action", "_parent_token")
+
+    def __init__(self, action):
+        self._action = action
+
+    def __enter__(self):
+        self._parent_token = _ACTION_CONTEXT.set(self._action)
+        return self._action
+
+    def __exit__(self, type, exception, traceback):
+        _ACTION_CONTEXT.reset(self._parent_token)
+
+
 _TASK_ID_NOT_SUPPLIED = object()
 
 import time
@@ -175,13 +235,35 @@ class Action(object):
     Actions should only be used from a single thread, by implication the
     thread where they were created.
 
-    @ivar _identification: Fields identifying this action.
+    @ivar _task_uuid: The UUID of the task this action belongs to.
+
+    @ivar _action_type: The type of this action.
 
-    @ivar _successFields: Fields to be included in successful finish message.
+    @ivar _successFields: Fields to be included in successful finish message,
+        or C{None} if none were added.
+
+    @ivar _last_child_index: The last component of the C{task_level} most
+        recently handed out to a message or child action, C{0} if none were.
 
     @ivar _finished: L{True} if the L{Action} has finished, otherwise L{False}.
+
+    @ivar _parent_token: The C{ContextVar} token to restore on C{__exit__}.
     """
 
+    # One of these is created for every action logged, so skip the per-instance
+    # __dict__:
+    __slots__ = (
+        "_successFields",
+        "_logger",
+        "_task_level",
+        "_last_child_index",
+        "_task_uuid",
+        "_action_type",
+        "_serializers",
+        "_finished",
+        "_parent_token",
+    )
+
     def __init__(self, logger, task_uuid, task_level, action_type, serializers=None):
         """
         Initialize the L{Action} and log the start message.
@@ -205,14 +287,12 @@ class Action(object):
             serialization will be done for messages generated by the
             L{Action}.
         """
-        self._successFields = {}
+        self._successFields = None
         self._logger = _output._DEFAULT_LOGGER if (logger is None) else logger
         self._task_level = task_level
-        self._last_child = None
-        self._identification = {
-            TASK_UUID_FIELD: task_uuid,
-            ACTION_TYPE_FIELD: action_type,
-        }
+        self._last_child_index = 0
+        self._task_uuid = task_uuid
+        self._action_type = action_type
         self._serializers = serializers
         self._finished = False
 
@@ -221,7 +301,7 @@ class Action(object):
         """
         @return str: the current action's task UUID.
         """
-        return self._identification[TASK_UUID_FIELD]
+        return self._task_uuid
 
     def serialize_task_id(self):
         """
@@ -231,9 +311,8 @@ class Action(object):
 
         @return: L{bytes} encoding the current location within the task.
         """
-        return "{}@{}".format(
-            self._identification[TASK_UUID_FIELD], self._nextTaskLevel().toString()
-        ).encode("ascii")
+        task_level = self._nextTaskLevel().toString()
+        return "{}@{}".format(self._task_uuid, task_level).encode("ascii")
 
     @classmethod
     def continue_task(cls, logger=None, task_id=_TASK_ID_NOT_SUPPLIED):
@@ -272,11 +351,17 @@ class Action(object):
 
         @return: The message's C{task_level}.
         """
-        if not self._last_child:
-            self._last_child = self._task_level.child()
-        else:
-            self._last_child = self._last_child.next_sibling()
-        return self._last_child
+        return TaskLevel(level=self._nextTaskLevelList())
+
+    def _nextTaskLevelList(self):
+        """
+        Like L{Action._nextTaskLevel}, but return the level as a new list,
+        ready to be put in a message, rather than as a L{TaskLevel}.
+
+        @return: The message's C{task_level} as a list of integers.
+        """
+        self._last_child_index += 1
+        return self._task_level._level + [self._last_child_index]
 
     def _start(self, fields):
         """
@@ -290,12 +375,11 @@ class Action(object):
         """
         fields[ACTION_STATUS_FIELD] = STARTED_STATUS
         fields[TIMESTAMP_FIELD] = time.time()
-        fields.update(self._identification)
-        fields[TASK_LEVEL_FIELD] = self._nextTaskLevel().as_list()
-        if self._serializers is None:
-            serializer = None
-        else:
-            serializer = self._serializers.start
+        fields[TASK_UUID_FIELD] = self._task_uuid
+        fields[ACTION_TYPE_FIELD] = self._action_type
+        fields[TASK_LEVEL_FIELD] = self._nextTaskLevelList()
+        serializers = self._serializers
+        serializer = None if serializers is None else serializers.start
         self._logger.write(fields, serializer)
 
     def finish(self, exception=None):
@@ -316,26 +400,28 @@ class Action(object):
         if self._finished:
             return
         self._finished = True
+        serializers = self._serializers
         serializer = None
         if exception is None:
             fields = self._successFields
+            if fields is None:
+                fields = {}
             fields[ACTION_STATUS_FIELD] = SUCCEEDED_STATUS
-            if self._serializers is not None:
-                serializer = self._serializers.success
+            if serializers is not None:
+                serializer = serializers.success
         else:
             fields = _error_extraction.get_fields_for_exception(self._logger, exception)
-            fields[EXCEPTION_FIELD] = "%s.%s" % (
-                exception.__class__.__module__,
-                exception.__class__.__name__,
-            )
+            exc_type = exception.__class__
+            fields[EXCEPTION_FIELD] = exc_type.__module__ + "." + exc_type.__name__
             fields[REASON_FIELD] = safeunicode(exception)
             fields[ACTION_STATUS_FIELD] = FAILED_STATUS
-            if self._serializers is not None:
-                serializer = self._serializers.failure
+            if serializers is not None:
+                serializer = serializers.failure
 
         fields[TIMESTAMP_FIELD] = time.time()
-        fields.update(self._identification)
-        fields[TASK_LEVEL_FIELD] = self._nextTaskLevel().as_list()
+        fields[TASK_UUID_FIELD] = self._task_uuid
+        fields[ACTION_TYPE_FIELD] = self._action_type
+        fields[TASK_LEVEL_FIELD] = self._nextTaskLevelList()
         self._logger.write(fields, serializer)
 
     def child(self, logger, action_type, serializers=None):
@@ -358,11 +444,7 @@ class Action(object):
         """
         newLevel = self._nextTaskLevel()
         return self.__class__(
-            logger,
-            self._identification[TASK_UUID_FIELD],
-            newLevel,
-            action_type,
-            serializers,
+            logger, self._task_uuid, newLevel, action_type, serializers
         )
 
     def run(self, f, *args, **kwargs):
@@ -382,23 +464,21 @@ class Action(object):
 
         @param fields: Additional fields to add to the result message.
         """
-        self._successFields.update(fields)
+        if self._successFields is None:
+            self._successFields = fields
+        else:
+            self._successFields.update(fields)
 
     # PEP 8 variant:
     add_success_fields = addSuccessFields
 
-    @contextmanager
     def context(self):
         """
         Create a context manager that ensures code runs within action's context.
 
         The action does NOT finish when the context is exited.
         """
-        parent = _ACTION_CONTEXT.set(self)
-        try:
-            yield self
-        finally:
-            _ACTION_CONTEXT.reset(parent)
+        return _ActionContext(self)
 
     # Python context manager implementation:
     def __enter__(self):
@@ -420,8 +500,8 @@ class Action(object):
     def log(self, message_type, **fields):
         """Log individual message."""
         fields[TIMESTAMP_FIELD] = time.time()
-        fields[TASK_UUID_FIELD] = self._identification[TASK_UUID_FIELD]
-        fields[TASK_LEVEL_FIELD] = self._nextTaskLevel().as_list()
+        fields[TASK_UUID_FIELD] = self._task_uuid
+        fields[TASK_LEVEL_FIELD] = self._nextTaskLevelList()
         fields[MESSAGE_TYPE_FIELD] = message_type
         self._logger.write(fields, fields.pop("__eliot_serializer__", None))
 
@@ -550,7 +630,7 @@ class WrittenAction(PClass):
     start_message = field(type=optional(WrittenMessage), mandatory=True, initial=None)
     end_message = field(type=optional(WrittenMessage), mandatory=True, initial=None)
     task_level = field(type=TaskLevel, mandatory=True)
-    task_uuid = field(type=unicode, mandatory=True, factory=unicode)
+    task_uuid = field(type=str, mandatory=True, factory=str)
     # Pyrsistent doesn't support pmap_field with recursive types.
     _children = pmap_field(TaskLevel, object)
 
@@ -791,13 +871,15 @@ def start_action(logger=None, action_type="", _serializers=None, **fields):
 
     @return: A new L{Action}.
     """
-    parent = current_action()
+    parent = _ACTION_CONTEXT.get(None)
     if parent is None:
-        return startTask(logger, action_type, _serializers, **fields)
+        action = Action(
+            logger, _new_task_uuid(), TaskLevel(level=[]), action_type, _serializers
+        )
     else:
         action = parent.child(logger, action_type, _serializers)
-        action._start(fields)
-        return action
+    action._start(fields)
+    return action
 
 
 def startTask(logger=None, action_type="", _serializers=None, **fields):
@@ -819,7 +901,7 @@ def startTask(logger=None, action_type="", _serializers=None, **fields):
     @return: A new L{Action}.
     """
     action = Action(
-        logger, unicode(uuid4()), TaskLevel(level=[]), action_type, _serializers
+        logger, _new_task_uuid(), TaskLevel(level=[]), action_type, _serializers
     )
     action._start(fields)
     return action
@@ -851,7 +933,7 @@ def preserve_context(f):
     @return: One-time use callable that calls given function in context of
         a child of current Eliot action.
     """
-    action = current_action()
+    action = _ACTION_CONTEXT.get(None)
     if action is None:
         return f
     task_id = action.serialize_task_id()
@@ -890,16 +972,11 @@ def log_call(
         )
 
     if action_type is None:
-        if PY3:
-            action_type = "{}.{}".format(
-                wrapped_function.__module__, wrapped_function.__qualname__
-            )
-        else:
-            action_type = wrapped_function.__name__
-
-    if PY3 and include_args is not None:
-        from inspect import signature
+        action_type = "{}.{}".format(
+            wrapped_function.__module__, wrapped_function.__qualname__
+        )
 
+    if include_args is not None:
         sig = signature(wrapped_function)
         if set(include_args) - set(sig.parameters):
             raise ValueError(
@@ -936,9 +1013,9 @@ def log_message(message_type, **fields):
     """
     # Loggers will hopefully go away...
     logger = fields.pop("__eliot_logger__", None)
-    action = current_action()
+    action = _ACTION_CONTEXT.get(None)
     if action is None:
-        action = Action(logger, str(uuid4()), TaskLevel(level=[]), "")
+        action = Action(logger, _new_task_uuid(), TaskLevel(level=[]), "")
     action.log(message_type, **fields)
 
 
@@ -183,6 +183,10 @@ class Logger(object):
         """
         Serialize the dictionary, and write it to C{self._destinations}.
         """
+        if not self._destinations._destinations:
+            # Nothing would receive the message, so skip the copy and the
+            # serialization:
+            return
         dictionary = dictionary.copy()
         try:
             if serializer is not None:
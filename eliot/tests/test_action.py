@@ -4,11 +4,13 @@ Tests for L{eliot._action}.
 
 from __future__ import unicode_literals
 
+import os
 import pickle
 import time
 from unittest import TestCase, skipIf
 from unittest.mock import patch
 from threading import Thread
+from uuid import UUID
 
 import six
 
@@ -43,6 +45,8 @@ from .._action import (
     WrongTaskLevel,
     TooManyCalls,
     log_call,
+    _new_task_uuid,
+    _RANDOM_BUFFER_SIZE,
 )
 from .._message import (
     EXCEPTION_FIELD,
@@ -110,6 +114,13 @@ class ActionTests(TestCase):
         action = Action(logger, "unique", TaskLevel(level=[]), "sys:thename")
         self.assertEqual(action.task_uuid, "unique")
 
+    def test_noInstanceDict(self):
+        """
+        L{Action} instances use slots rather than a per-instance C{__dict__}.
+        """
+        action = Action(MemoryLogger(), "unique", TaskLevel(level=[]), "sys:name")
+        self.assertFalse(hasattr(action, "__dict__"))
+
     def test_startMessageSerialization(self):
         """
         The start message logged by L{Action._start} is created with the
@@ -140,12 +151,8 @@ class ActionTests(TestCase):
         logger2 = MemoryLogger()
         child = action.child(logger2, "newsystem:newname")
         self.assertEqual(
-            [child._logger, child._identification, child._task_level],
-            [
-                logger2,
-                {"task_uuid": "unique", "action_type": "newsystem:newname"},
-                TaskLevel(level=[1]),
-            ],
+            [child._logger, child.task_uuid, child._action_type, child._task_level],
+            [logger2, "unique", "newsystem:newname", TaskLevel(level=[1])],
         )
 
     def test_childLevel(self):
@@ -554,9 +561,46 @@ class StartActionAndTaskTests(TestCase):
         logger = MemoryLogger()
         action = startTask(logger, "sys:do")
         action2 = startTask(logger, "sys:do")
-        self.assertNotEqual(
-            action._identification["task_uuid"], action2._identification["task_uuid"]
-        )
+        self.assertNotEqual(action.task_uuid, action2.task_uuid)
+
+    def test_startTaskUUIDFormat(self):
+        """
+        L{startTask} uses a random (version 4) UUID in canonical string form
+        as the C{task_uuid}.
+        """
+        action = startTask(MemoryLogger(), "sys:do")
+        task_uuid = UUID(action.task_uuid)
+        self.assertEqual((task_uuid.version, str(task_uuid)), (4, action.task_uuid))
+
+    def test_newTaskUUIDsUnique(self):
+        """
+        Task UUIDs don't repeat, including across refills of the buffer of
+        random bytes they are generated from.
+        """
+        uuids = [_new_task_uuid() for _ in range(_RANDOM_BUFFER_SIZE // 8 + 1)]
+        self.assertEqual(len(set(uuids)), len(uuids))
+
+    @skipIf(
+        not hasattr(os, "register_at_fork"), "Random bytes aren't buffered on < 3.7"
+    )
+    def test_newTaskUUIDAfterFork(self):
+        """
+        A forked child process doesn't generate the same task UUIDs as its
+        parent.
+        """
+        _new_task_uuid()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.write(write_fd, _new_task_uuid().encode("ascii"))
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_fd, "rb") as f:
+            child_uuid = f.read().decode("ascii")
+        self.assertNotEqual(child_uuid, _new_task_uuid())
 
     def test_startTaskLogsStart(self):
         """
@@ -568,7 +612,7 @@ class StartActionAndTaskTests(TestCase):
             self,
             logger.messages[0],
             {
-                "task_uuid": action._identification["task_uuid"],
+                "task_uuid": action.task_uuid,
                 "task_level": [1],
                 "action_type": "sys:do",
                 "action_status": "started",
@@ -605,7 +649,7 @@ class StartActionAndTaskTests(TestCase):
             self,
             logger.messages[0],
             {
-                "task_uuid": action._identification["task_uuid"],
+                "task_uuid": action.task_uuid,
                 "task_level": [1],
                 "action_type": "sys:do",
                 "action_status": "started",
@@ -623,7 +667,7 @@ class StartActionAndTaskTests(TestCase):
         with parent:
             action = start_action(logger, "sys:do")
             self.assertIsInstance(action, Action)
-            self.assertEqual(action._identification["task_uuid"], "uuid")
+            self.assertEqual(action.task_uuid, "uuid")
             self.assertEqual(action._task_level, TaskLevel(level=[2, 1]))
 
     def test_startActionWithParentLogStart(self):
@@ -659,7 +703,7 @@ class StartActionAndTaskTests(TestCase):
             self,
             messages[0],
             {
-                "task_uuid": action._identification["task_uuid"],
+                "task_uuid": action.task_uuid,
                 "task_level": [1],
                 "action_type": "sys:do",
                 "action_status": "started",
@@ -679,7 +723,7 @@ class StartActionAndTaskTests(TestCase):
             self,
             messages[0],
             {
-                "task_uuid": action._identification["task_uuid"],
+                "task_uuid": action.task_uuid,
                 "task_level": [1],
                 "action_type": "sys:do",
                 "action_status": "started",
@@ -743,12 +787,13 @@ class SerializationTests(TestCase):
 
         newAction = Action.continue_task(MemoryLogger(), taskId)
         self.assertEqual(
-            [newAction.__class__, newAction._identification, newAction._task_level],
             [
-                Action,
-                {"task_uuid": "uniq456", "action_type": "eliot:remote_task"},
-                TaskLevel(level=[3, 4, 1]),
+                newAction.__class__,
+                newAction.task_uuid,
+                newAction._action_type,
+                newAction._task_level,
             ],
+            [Action, "uniq456", "eliot:remote_task", TaskLevel(level=[3, 4, 1])],
         )
 
     def test_continueTaskUnicode(self):
@@ -759,7 +804,7 @@ class SerializationTests(TestCase):
         task_id = unicode(original_action.serialize_task_id(), "utf-8")
 
         new_action = Action.continue_task(MemoryLogger(), task_id)
-        self.assertEqual(new_action._identification["task_uuid"], "uniq790")
+        self.assertEqual(new_action.task_uuid, "uniq790")
 
     def test_continueTaskStartsAction(self):
         """
@@ -521,6 +521,22 @@ class LoggerTests(TestCase):
         logger.write({"message_type": "mymessage", "length": "thething"}, serializer)
         self.assertEqual(written, [{"message_type": "mymessage", "length": 8}])
 
+    def test_noDestinations(self):
+        """
+        If all destinations have been removed, L{Logger.write} doesn't
+        serialize the message.
+        """
+        logger, written = makeLogger()
+        logger._destinations.remove(written.append)
+        serialized = []
+
+        class Serializer(object):
+            def serialize(self, message):
+                serialized.append(message)
+
+        logger.write({"hello": 1}, Serializer())
+        self.assertEqual(serialized, [])
+
     def test_passedInDictionaryUnmodified(self):
         """
         The dictionary passed in to L{Logger.write} is not modified.